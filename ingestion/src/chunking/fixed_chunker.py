@@ -1,6 +1,6 @@
 # ingestion/src/chunking/fixed_chunker.py
 
-from typing import List, Dict
+from typing import Dict, Iterator, List
 
 
 class FixedChunker:
@@ -15,39 +15,49 @@ class FixedChunker:
         self.chunk_size = chunk_size
         self.overlap = overlap
 
-    def chunk(self, text: str) -> List[Dict]:
+    def count(self, text: str) -> int:
         """
-        Split text into overlapping chunks
-
-        :param text: cleaned input text
-        :return: list of chunks with metadata
+        Number of chunks chunk()/chunk_iter() produce for text
         """
-        chunks: List[Dict] = []
-
         if not text:
-            return chunks
+            return 0
 
-        start = 0
-        text_length = len(text)
-        chunk_index = 0
+        stride = self.chunk_size - self.overlap
 
-        while start < text_length:
-            end = start + self.chunk_size
-            chunk_text = text[start:end]
+        # Chunks start at 0, stride, 2*stride, ... while start < len(text)
+        return (len(text) + stride - 1) // stride
 
-            chunks.append({
-                "chunk_index": chunk_index,
-                "text": chunk_text,
-                "start_index": start,
-                "end_index": min(end, text_length),
-            })
+    def chunk_iter(self, text: str) -> Iterator[Dict]:
+        """
+        Lazily yield overlapping chunks (same dicts as chunk())
 
-            chunk_index += 1
-            start += self.chunk_size - self.overlap
+        :param text: cleaned input text
+        :return: iterator of chunks with metadata
+        """
+        text_length = len(text)
+        chunk_size = self.chunk_size
+        total_chunks = self.count(text)
+
+        # Start offsets come straight from range(); slicing past the end
+        # of text is safe, so only end_index needs clamping
+        return (
+            {
+                "chunk_index": i,
+                "text": text[start:start + chunk_size],
+                "start_index": start,
+                "end_index": min(start + chunk_size, text_length),
+                "total_chunks": total_chunks,
+            }
+            for i, start in enumerate(
+                range(0, text_length, chunk_size - self.overlap)
+            )
+        )
 
-        # Add total_chunks metadata AFTER chunking
-        total_chunks = len(chunks)
-        for chunk in chunks:
-            chunk["total_chunks"] = total_chunks
+    def chunk(self, text: str) -> List[Dict]:
+        """
+        Split text into overlapping chunks
 
-        return chunks
+        :param text: cleaned input text
+        :return: list of chunks with metadata
+        """
+        return list(self.chunk_iter(text))
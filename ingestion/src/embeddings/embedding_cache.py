@@ -0,0 +1,152 @@
+# ingestion/src/embeddings/embedding_cache.py
+
+import os
+from typing import List, Optional
+
+import lmdb
+import numpy as np
+import xxhash
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "neural_search", "embeddings"
+)
+
+# xxh64 digest of (model id, chunk text), stored in front of the vector bytes
+_DIGEST_SIZE = 8
+
+# Transaction attempts before giving up (map resized / grown in between)
+_MAX_ATTEMPTS = 8
+
+
+def _digest(model_id: str, text: str) -> bytes:
+    return xxhash.xxh64_digest(
+        model_id.encode("utf-8") + b"\0" + text.encode("utf-8")
+    )
+
+
+class EmbeddingCache:
+    """
+    On-disk (LMDB) embedding cache keyed by (file_hash, chunk_index)
+
+    Each value is an xxh64 digest of the model id and chunk text followed
+    by the float32 vector, so a hit is only returned when both the model
+    and the chunk text are unchanged (e.g. after a model swap or a change
+    of chunk size). Mismatching entries are overwritten on the next write.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        map_size: int = 1 << 30,
+        max_map_size: int = 1 << 34,
+    ):
+        """
+        :param map_size: initial LMDB map size in bytes
+        :param max_map_size: the map doubles on demand up to this size;
+                             once reached, new entries are not cached
+        """
+        path = path or os.getenv("EMBEDDING_CACHE_DIR", DEFAULT_CACHE_DIR)
+        os.makedirs(path, exist_ok=True)
+
+        self.max_map_size = max_map_size
+        self.env = lmdb.open(path, map_size=map_size)
+
+    @staticmethod
+    def _key(file_hash: str, chunk_index: int) -> bytes:
+        return f"{file_hash}:{chunk_index}".encode()
+
+    def get_many(
+        self,
+        file_hash: str,
+        chunk_indices: List[int],
+        texts: List[str],
+        model_id: str,
+    ) -> List[Optional[np.ndarray]]:
+        """
+        :param model_id: identifies the model that produced the vectors
+        :return: cached vector per chunk, or None on a miss
+        """
+        for _ in range(_MAX_ATTEMPTS):
+            try:
+                return self._read(file_hash, chunk_indices, texts, model_id)
+            except lmdb.MapResizedError:
+                # Another ingestion process grew the map: adopt its size
+                self.env.set_mapsize(0)
+            except lmdb.Error as exc:
+                # The cache is only an optimization: treat errors as misses
+                print(f"[WARN] Embedding cache read failed ({exc}), ignoring cache")
+                break
+
+        return [None] * len(texts)
+
+    def _read(
+        self, file_hash, chunk_indices, texts, model_id
+    ) -> List[Optional[np.ndarray]]:
+        vectors = []
+
+        with self.env.begin() as txn:
+            for chunk_index, text in zip(chunk_indices, texts):
+                value = txn.get(self._key(file_hash, chunk_index))
+
+                if value is None or value[:_DIGEST_SIZE] != _digest(model_id, text):
+                    vectors.append(None)
+                    continue
+
+                vectors.append(
+                    np.frombuffer(value, dtype=np.float32, offset=_DIGEST_SIZE)
+                )
+
+        return vectors
+
+    def put_many(
+        self,
+        file_hash: str,
+        chunk_indices: List[int],
+        texts: List[str],
+        vectors,
+        model_id: str,
+    ) -> bool:
+        """
+        :return: False if the entries were skipped (cache full or unusable)
+        """
+        items = [
+            (
+                self._key(file_hash, chunk_index),
+                _digest(model_id, text) + np.asarray(vector, dtype=np.float32).tobytes(),
+            )
+            for chunk_index, text, vector in zip(chunk_indices, texts, vectors)
+        ]
+
+        for _ in range(_MAX_ATTEMPTS):
+            try:
+                with self.env.begin(write=True) as txn:
+                    for key, value in items:
+                        txn.put(key, value)
+                return True
+            except lmdb.MapResizedError:
+                # Another ingestion process grew the map: adopt its size
+                self.env.set_mapsize(0)
+            except lmdb.MapFullError:
+                # The failed transaction was aborted; grow the map and retry
+                map_size = self.env.info()["map_size"]
+
+                if map_size >= self.max_map_size:
+                    # The cache is only an optimization: never fail ingestion
+                    print(
+                        f"[WARN] Embedding cache full ({map_size} bytes), "
+                        f"skipping {len(items)} entries"
+                    )
+                    return False
+
+                self.env.set_mapsize(min(map_size * 2, self.max_map_size))
+            except lmdb.Error as exc:
+                print(
+                    f"[WARN] Embedding cache write failed ({exc}), "
+                    f"skipping {len(items)} entries"
+                )
+                return False
+
+        return False
+
+    def close(self):
+        self.env.close()
@@ -1,22 +1,227 @@
-from sentence_transformers import SentenceTransformer
+import os
+from collections import OrderedDict
+from itertools import islice
+
+import numpy as np
+import onnxruntime as ort
+import xxhash
+from huggingface_hub import hf_hub_download
+from tokenizers import Tokenizer
+
+from embeddings.embedding_cache import EmbeddingCache
+
+
+# INT8 (dynamically quantized) export of all-MiniLM-L6-v2.
+# Same weights the backend uses for query embeddings (Xenova/all-MiniLM-L6-v2).
+ONNX_MODEL_REPO = "Xenova/all-MiniLM-L6-v2"
+ONNX_MODEL_FILE = "onnx/model_quantized.onnx"
+TOKENIZER_REPO = "sentence-transformers/all-MiniLM-L6-v2"
+
+# all-MiniLM-L6-v2 was trained with max_seq_length=256
+MAX_SEQ_LENGTH = 256
+
+
+def _file_digest(path: str) -> str:
+    digest = xxhash.xxh64()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
 
 class LocalEmbedder:
     """
-    Free, local semantic embedder using SentenceTransformers
+    Free, local semantic embedder using ONNX Runtime (INT8 all-MiniLM-L6-v2)
     """
 
-    def __init__(self):
-        self.model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    def __init__(
+        self,
+        model_path: str = None,
+        batch_size: int = 64,
+        workers: int = 1,
+        cache_size: int = 10_000,
+        disk_cache: EmbeddingCache = None,
+    ):
+        """
+        :param model_path: path to a quantized model.onnx
+                           (defaults to LOCAL_EMBEDDER_ONNX_PATH, then the HF hub)
+        :param batch_size: number of texts per session.run call
+        :param workers: number of concurrent embedder processes sharing the CPU
+        :param cache_size: max embeddings memoized by token-id hash (LRU)
+        :param disk_cache: optional on-disk cache keyed by (file_hash, chunk_index)
+        """
+        model_path = model_path or os.getenv("LOCAL_EMBEDDER_ONNX_PATH")
+        if not model_path:
+            model_path = hf_hub_download(ONNX_MODEL_REPO, ONNX_MODEL_FILE)
+
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = (
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        sess_options.enable_mem_pattern = True
+        sess_options.enable_cpu_mem_arena = True
+        sess_options.intra_op_num_threads = max(
+            2, (os.cpu_count() or 1) // max(1, workers)
+        )
+
+        self.session = ort.InferenceSession(
+            model_path,
+            sess_options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        # Disk cache entries are only valid for this exact model + tokenization
+        self.model_id = (
+            f"{_file_digest(model_path)}:{TOKENIZER_REPO}:{MAX_SEQ_LENGTH}"
+        )
+
+        self.tokenizer = Tokenizer.from_pretrained(TOKENIZER_REPO)
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.no_padding()
+
+        self.batch_size = batch_size
+
+        # xxh64(token ids) -> embedding, for the lifetime of the process
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, np.ndarray]" = OrderedDict()
+
+        self.disk_cache = disk_cache
+
+    def _encode(self, encodings):
+        """
+        Run the ONNX graph per batch over tokenized inputs
+        and mean-pool + L2-normalize the token embeddings.
+
+        Batches are built over length-sorted inputs ("smart batching")
+        so each batch pads to a similar length, then unpermuted.
 
-    def embed_chunks(self, chunks):
+        :return: float32 array of shape (len(encodings), 384)
+        """
+        lengths = [len(enc.ids) for enc in encodings]
+        order = np.argsort(lengths, kind="stable")
+        sorted_encodings = [encodings[i] for i in order]
+        batches = []
+
+        for start in range(0, len(sorted_encodings), self.batch_size):
+            batch = sorted_encodings[start:start + self.batch_size]
+            max_len = max(len(enc.ids) for enc in batch)
+
+            # Pad to the longest sequence in this batch only
+            input_ids = np.zeros((len(batch), max_len), dtype=np.int64)
+            attention_mask = np.zeros((len(batch), max_len), dtype=np.int64)
+            for row, enc in enumerate(batch):
+                input_ids[row, :len(enc.ids)] = enc.ids
+                attention_mask[row, :len(enc.ids)] = 1
+
+            feeds = {
+                "input_ids": input_ids,
+                "attention_mask": attention_mask,
+            }
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            # Mean pooling over non-padding tokens
+            mask = attention_mask[:, :, None].astype(np.float32)
+            summed = (token_embeddings * mask).sum(axis=1)
+            counts = np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled = summed / counts
+
+            # L2 normalize (matches the SentenceTransformer Normalize module)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            batches.append(pooled / np.clip(norms, 1e-12, None))
+
+        # Scatter back to input order
+        embeddings = np.empty(
+            (len(encodings), batches[0].shape[1]), dtype=np.float32
+        )
+        embeddings[order] = np.vstack(batches)
+
+        return embeddings
+
+    def _encode_cached(self, texts):
+        """
+        Tokenize all texts in one call and encode only token sequences
+        not seen before (in this call or the LRU cache).
+
+        Keys are hashes of the token ids the model actually sees: the
+        uncased WordPiece tokenizer drops case, accents and whitespace
+        differences and truncates at MAX_SEQ_LENGTH, so near-duplicate
+        texts that map to the same ids share one (identical) embedding.
+
+        :return: float32 array of shape (len(texts), 384)
+        """
+        encodings = self.tokenizer.encode_batch(texts)
+        keys = [
+            xxhash.xxh64_intdigest(np.asarray(enc.ids, dtype=np.uint32).tobytes())
+            for enc in encodings
+        ]
+
+        missing = {}
+        for key, enc in zip(keys, encodings):
+            if key not in self._cache and key not in missing:
+                missing[key] = enc
+
+        fresh = {}
+        if missing:
+            encoded = self._encode(list(missing.values()))
+            fresh = dict(zip(missing.keys(), encoded))
+
+        vectors = []
+        for key in keys:
+            vector = fresh.get(key)
+            if vector is None:
+                vector = self._cache[key]
+                self._cache.move_to_end(key)
+            vectors.append(vector)
+
+        for key, vector in fresh.items():
+            self._cache[key] = vector.copy()
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return np.stack(vectors)
+
+    def _encode_file_chunks(self, texts, file_hash, chunk_indices):
+        """
+        Serve (file_hash, chunk_index) hits from the disk cache,
+        encode only the misses and write them back
+        """
+        vectors = self.disk_cache.get_many(
+            file_hash, chunk_indices, texts, self.model_id
+        )
+        misses = [pos for pos, vector in enumerate(vectors) if vector is None]
+
+        if misses:
+            miss_texts = [texts[pos] for pos in misses]
+            encoded = self._encode_cached(miss_texts)
+
+            self.disk_cache.put_many(
+                file_hash,
+                [chunk_indices[pos] for pos in misses],
+                miss_texts,
+                encoded,
+                self.model_id,
+            )
+
+            for pos, vector in zip(misses, encoded):
+                vectors[pos] = vector
+
+        return np.stack(vectors)
+
+    def embed_chunks(self, chunks, file_hash: str = None, first_index: int = 0):
         """
         Accepts:
           - List[str]
           - List[dict] with a 'text' field
 
+        With file_hash and a disk cache, chunks are looked up by their
+        'chunk_index' (or first_index + position) before encoding.
+
         Returns:
-          - List[dict] with { text, embedding }
+          - List[dict] with { text, embedding (np.ndarray) }
         """
 
         if not chunks:
@@ -26,12 +231,15 @@ class LocalEmbedder:
         # Normalize chunks to List[str]
         # -----------------------------
         texts = []
+        chunk_indices = []
 
-        for chunk in chunks:
+        for position, chunk in enumerate(chunks, start=first_index):
             if isinstance(chunk, str):
                 texts.append(chunk)
+                chunk_indices.append(position)
             elif isinstance(chunk, dict) and "text" in chunk:
                 texts.append(chunk["text"])
+                chunk_indices.append(chunk.get("chunk_index", position))
             else:
                 raise TypeError(
                     f"Unsupported chunk type for embedding: {type(chunk)}"
@@ -40,19 +248,40 @@ class LocalEmbedder:
         # -----------------------------
         # Generate embeddings
         # -----------------------------
-        embeddings = self.model.encode(
-            texts,
-            show_progress_bar=False
-        )
+        if file_hash and self.disk_cache is not None:
+            embeddings = self._encode_file_chunks(texts, file_hash, chunk_indices)
+        else:
+            embeddings = self._encode_cached(texts)
 
         # -----------------------------
         # Attach embeddings
         # -----------------------------
+        # Rows stay as float32 numpy views; no per-float Python objects
         embedded = []
         for text, vector in zip(texts, embeddings):
             embedded.append({
                 "text": text,
-                "embedding": vector.tolist()
+                "embedding": vector
             })
 
         return embedded
+
+    def embed_iter(self, chunks, batch_size: int = None, file_hash: str = None):
+        """
+        Streaming variant of embed_chunks: pull batch_size chunks at a time
+        from any iterable and yield embedded chunks, so only one batch of
+        texts and vectors is alive at once.
+        """
+        batch_size = batch_size or self.batch_size
+        chunks = iter(chunks)
+        offset = 0
+
+        while True:
+            batch = list(islice(chunks, batch_size))
+            if not batch:
+                return
+
+            yield from self.embed_chunks(
+                batch, file_hash=file_hash, first_index=offset
+            )
+            offset += len(batch)
@@ -10,21 +10,9 @@ class MockEmbedder:
     Replaces mock embeddings with real semantic embeddings.
     """
 
-    def __init__(self, embedding_dim: int = 1536):
-        self.embedding_dim = embedding_dim
+    def __init__(self):
         self.model = SentenceTransformer("all-MiniLM-L6-v2")
-
-    def _normalize_embedding(self, vector: List[float]) -> List[float]:
-        """
-        Pad or truncate embedding to match Qdrant dimension (1536)
-        """
-        if len(vector) > self.embedding_dim:
-            return vector[: self.embedding_dim]
-
-        if len(vector) < self.embedding_dim:
-            return vector + [0.0] * (self.embedding_dim - len(vector))
-
-        return vector
+        self.embedding_dim = self.model.get_sentence_embedding_dimension()
 
     def embed_chunks(self, chunks: List[Dict]) -> List[Dict]:
         texts = [chunk["text"] for chunk in chunks]
@@ -38,11 +26,9 @@ class MockEmbedder:
         enriched_chunks = []
 
         for chunk, emb in zip(chunks, embeddings):
-            embedding = self._normalize_embedding(emb.tolist())
-
             enriched_chunks.append({
                 **chunk,
-                "embedding": embedding,
+                "embedding": emb,
                 "embedding_model": "local-all-MiniLM-L6-v2",
                 "embedding_dim": self.embedding_dim,
             })
@@ -1,14 +1,23 @@
 # ingestion/src/embeddings/openai_embedder.py
 
+import asyncio
+import base64
 import os
 from typing import List, Dict
 
-from openai import OpenAI
+import numpy as np
+import tiktoken
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Request packing limits
+MAX_BATCH_TOKENS = 6000
+MAX_BATCH_INPUTS = 2048
+MAX_CONCURRENT_REQUESTS = 10
+
 
 class OpenAIEmbedder:
     """
@@ -20,8 +29,61 @@ class OpenAIEmbedder:
         if not api_key:
             raise EnvironmentError("OPENAI_API_KEY is not set")
 
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
         self.model = model
+        self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    def _pack_batches(self, texts: List[str]) -> List[List[str]]:
+        """
+        Greedily pack texts (in order) into batches of at most
+        MAX_BATCH_TOKENS tokens and MAX_BATCH_INPUTS inputs
+        """
+        token_counts = [
+            len(tokens) for tokens in self.encoding.encode_ordinary_batch(texts)
+        ]
+
+        batches = []
+        batch = []
+        batch_tokens = 0
+
+        for text, count in zip(texts, token_counts):
+            if batch and (
+                batch_tokens + count > MAX_BATCH_TOKENS
+                or len(batch) >= MAX_BATCH_INPUTS
+            ):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+
+            batch.append(text)
+            batch_tokens += count
+
+        if batch:
+            batches.append(batch)
+
+        return batches
+
+    async def _embed_batches(self, batches: List[List[str]]) -> List:
+        """
+        Send all batches concurrently, bounded by a semaphore
+        """
+        sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+        async with AsyncOpenAI(api_key=self.api_key) as client:
+
+            async def _one(batch: List[str]):
+                async with sem:
+                    response = await client.embeddings.create(
+                        model=self.model,
+                        input=batch,
+                        encoding_format="base64",
+                    )
+                    return response.data
+
+            results = await asyncio.gather(*[_one(b) for b in batches])
+
+        # gather() keeps batch order; batches keep input order
+        return [emb for data in results for emb in data]
 
     def embed_chunks(self, chunks: List[Dict]) -> List[Dict]:
         """
@@ -32,20 +94,20 @@ class OpenAIEmbedder:
         """
         texts = [chunk["text"] for chunk in chunks]
 
-        response = self.client.embeddings.create(
-            model=self.model,
-            input=texts,
-        )
-
-        embeddings = response.data
+        embeddings = asyncio.run(self._embed_batches(self._pack_batches(texts)))
 
         enriched_chunks = []
         for chunk, emb in zip(chunks, embeddings):
+            # base64 payload is the raw little-endian float32 vector
+            vector = np.frombuffer(
+                base64.b64decode(emb.embedding), dtype=np.float32
+            )
+
             enriched_chunks.append({
                 **chunk,
-                "embedding": emb.embedding,
+                "embedding": vector,
                 "embedding_model": self.model,
-                "embedding_dim": len(emb.embedding),
+                "embedding_dim": len(vector),
             })
 
         return enriched_chunks
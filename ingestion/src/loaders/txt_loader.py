@@ -1,8 +1,19 @@
 # ingestion/src/loaders/txt_loader.py
 
+import codecs
+import mmap
 from pathlib import Path
 from typing import Dict
 
+# Checked in order: the UTF-32 LE BOM starts with the UTF-16 LE BOM
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
 
 class TxtLoader:
     """
@@ -24,13 +35,7 @@ class TxtLoader:
         if path.suffix.lower() != ".txt":
             raise ValueError("TxtLoader supports only .txt files")
 
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                text = f.read()
-        except UnicodeDecodeError:
-            # fallback encoding
-            with open(path, "r", encoding="latin-1") as f:
-                text = f.read()
+        text = self._decode(path)
 
         return {
             "text": text,
@@ -40,3 +45,29 @@ class TxtLoader:
                 "file_path": str(path.resolve()),
             },
         }
+
+    def _decode(self, path: Path) -> str:
+        """
+        Decode the file from a single read-only mmap.
+        Encoding comes from the BOM, else UTF-8 with latin-1 fallback.
+        """
+        if path.stat().st_size == 0:
+            return ""
+
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as raw:
+                head = raw[:4]
+                encoding = next(
+                    (enc for bom, enc in _BOMS if head.startswith(bom)),
+                    None,
+                )
+
+                with memoryview(raw) as view:
+                    if encoding:
+                        return str(view, encoding, "replace")
+
+                    try:
+                        return str(view, "utf-8")
+                    except UnicodeDecodeError:
+                        # fallback encoding
+                        return str(view, "latin-1")
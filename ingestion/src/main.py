@@ -1,5 +1,6 @@
 import os
 import argparse
+import asyncio
 
 from loaders.txt_loader import TxtLoader
 from loaders.pdf_loader import PdfLoader
@@ -8,91 +9,125 @@ from chunking.fixed_chunker import FixedChunker
 from pipelines.qdrant_writer import QdrantWriter
 
 from embeddings.local_embedder import LocalEmbedder
-
-
-# -----------------------------
-# CLI Arguments
-# -----------------------------
-parser_cli = argparse.ArgumentParser(description="Ingest a document into Qdrant")
-parser_cli.add_argument(
-    "--file",
-    type=str,
-    required=True,
-    help="Path to the document file to ingest"
-)
-parser_cli.add_argument(
-    "--doc_id",
-    type=str,
-    required=True,
-    help="Document ID (used for file-scoped retrieval)"
-)
-parser_cli.add_argument(
-    "--file_hash",
-    type=str,
-    required=True,
-    help="SHA-256 hash of the document file (used for deduplication)"
-)
-
-args = parser_cli.parse_args()
-
-file_path = args.file
-doc_id = args.doc_id
-file_hash = args.file_hash
-
-if not os.path.exists(file_path):
-    raise FileNotFoundError(f"File not found: {file_path}")
-
-
-# -----------------------------
-# Select Loader by File Type
-# -----------------------------
-ext = os.path.splitext(file_path)[1].lower()
-
-if ext == ".pdf":
-    loader = PdfLoader()
-elif ext == ".txt":
-    loader = TxtLoader()
-else:
-    raise ValueError(f"Unsupported file type: {ext}")
-
-
-# -----------------------------
-# Embedder (FREE – Local)
-# -----------------------------
-embedder = LocalEmbedder()
-
-
-# -----------------------------
-# Pipeline
-# -----------------------------
-text_parser = TextParser()
-chunker = FixedChunker(chunk_size=1000, overlap=200)
-writer = QdrantWriter()
-
-# Load document
-doc = loader.load(file_path)
-
-# Parse & chunk
-clean_text = text_parser.parse(doc["text"])
-chunks = chunker.chunk(clean_text)
-
-print(f"[DEBUG] Total chunks created: {len(chunks)}")
-
-if not chunks:
-    raise ValueError("No chunks created from document text")
-
-# Embed (REAL semantic embeddings)
-embedded_chunks = embedder.embed_chunks(chunks)
-
-# Persist to Qdrant (doc_id + file_hash INCLUDED)
-writer.upsert_chunks(
-    embedded_chunks,
-    doc_id=doc_id,
-    source_file=os.path.basename(file_path),
-    file_hash=file_hash
-)
-
-print(
-    f"✅ Successfully ingested '{os.path.basename(file_path)}' "
-    f"(doc_id={doc_id}, file_hash={file_hash}) using LOCAL embeddings"
-)
+from embeddings.embedding_cache import EmbeddingCache
+
+
+def main():
+    # -----------------------------
+    # CLI Arguments
+    # -----------------------------
+    parser_cli = argparse.ArgumentParser(description="Ingest a document into Qdrant")
+    parser_cli.add_argument(
+        "--file",
+        type=str,
+        required=True,
+        help="Path to the document file to ingest"
+    )
+    parser_cli.add_argument(
+        "--doc_id",
+        type=str,
+        required=True,
+        help="Document ID (used for file-scoped retrieval)"
+    )
+    parser_cli.add_argument(
+        "--file_hash",
+        type=str,
+        required=True,
+        help="SHA-256 hash of the document file (used for deduplication)"
+    )
+
+    args = parser_cli.parse_args()
+
+    file_path = args.file
+    doc_id = args.doc_id
+    file_hash = args.file_hash
+
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    # -----------------------------
+    # Select Loader by File Type
+    # -----------------------------
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext == ".pdf":
+        loader = PdfLoader(preserve_newlines=True)
+    elif ext == ".txt":
+        loader = TxtLoader()
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+    # -----------------------------
+    # Pipeline
+    # -----------------------------
+    text_parser = TextParser()
+    chunker = FixedChunker(chunk_size=1000, overlap=200)
+    writer = QdrantWriter()
+
+    # Load document
+    doc = loader.load(file_path)
+
+    # Parse & count chunks (chunks themselves are generated lazily)
+    clean_text = text_parser.parse(doc["text"])
+    total_chunks = chunker.count(clean_text)
+
+    print(f"[DEBUG] Total chunks created: {total_chunks}")
+
+    if not total_chunks:
+        raise ValueError("No chunks created from document text")
+
+    # Point ids are derived from (file_hash, chunk_index): skip re-ingestion
+    # of the same file under the same document
+    if writer.is_ingested(file_hash, total_chunks, doc_id):
+        print(
+            f"⏭️  '{os.path.basename(file_path)}' already ingested "
+            f"(doc_id={doc_id}, file_hash={file_hash}), skipping embedding"
+        )
+        return
+
+    # -----------------------------
+    # Embedder (FREE – Local)
+    # -----------------------------
+    # Embeddings of previously seen (file_hash, chunk_index) come from disk
+    embedding_cache = EmbeddingCache()
+
+    try:
+        embedder = LocalEmbedder(disk_cache=embedding_cache)
+
+        # Chunk -> embed (REAL semantic embeddings) -> persist, one batch at a time.
+        # 256 texts per pull leaves room for length-sorted ONNX batches of 64.
+        embedded_chunks = embedder.embed_iter(
+            chunker.chunk_iter(clean_text),
+            batch_size=256,
+            file_hash=file_hash,
+        )
+
+        # Persist to Qdrant (doc_id + file_hash INCLUDED),
+        # uploading batches concurrently while the next ones are embedded
+        try:
+            asyncio.run(writer.upsert_stream_async(
+                embedded_chunks,
+                doc_id=doc_id,
+                source_file=os.path.basename(file_path),
+                file_hash=file_hash,
+                total_chunks=total_chunks,
+            ))
+        except BaseException:
+            # Points are written while the document is still being embedded.
+            # Don't leave a partial document behind: the backend dedups
+            # uploads on file_hash and would never let it be re-ingested.
+            writer.delete_file(file_hash)
+            raise
+    finally:
+        embedding_cache.close()
+
+    print(
+        f"✅ Successfully ingested '{os.path.basename(file_path)}' "
+        f"(doc_id={doc_id}, file_hash={file_hash}) using LOCAL embeddings"
+    )
+
+
+# Guard required: PdfLoader uses a process pool, which re-imports __main__
+# under the spawn/forkserver start methods
+if __name__ == "__main__":
+    main()
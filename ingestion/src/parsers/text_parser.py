@@ -2,6 +2,10 @@
 
 import re
 
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_SPACES_TABS = re.compile(r"[ \t]+")
+_CR_TO_LF = str.maketrans({"\r": "\n"})
+
 
 class TextParser:
     """
@@ -13,13 +17,15 @@ class TextParser:
             return ""
 
         # Normalize line endings
-        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        # (the "\r" scan allocates nothing, so LF-only text is untouched)
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").translate(_CR_TO_LF)
 
         # Remove extra blank lines (more than 1 newline)
-        text = re.sub(r"\n\s*\n+", "\n\n", text)
+        text = _BLANK_LINES.sub("\n\n", text)
 
         # Replace multiple spaces/tabs with single space
-        text = re.sub(r"[ \t]+", " ", text)
+        text = _SPACES_TABS.sub(" ", text)
 
         # Strip leading/trailing whitespace
         text = text.strip()
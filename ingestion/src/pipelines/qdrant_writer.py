@@ -1,11 +1,42 @@
 # ingestion/src/pipelines/qdrant_writer.py
 
-from typing import List, Dict
+import asyncio
+from typing import Dict, Iterable, Iterator, List, Tuple
 from datetime import datetime
-from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, VectorParams, Distance
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Batch,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    MatchValue,
+    VectorParams,
+    Distance,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+)
+import numpy as np
 import uuid
 
+# Vectors uploaded per request
+UPSERT_BATCH_SIZE = 256
+
+# Upsert requests in flight at once (async path)
+MAX_CONCURRENT_UPSERTS = 4
+
+# int8 copies of the vectors, kept in RAM for search
+SCALAR_QUANTIZATION = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(
+        type=ScalarType.INT8,
+        quantile=0.99,
+        always_ram=True,
+    ),
+)
+
+# Namespace for deterministic point ids: uuid5(ns, "<file_hash>:<chunk_index>")
+POINT_ID_NAMESPACE = uuid.UUID("6ba7b810-9dad-11d1-80b4-00c04fd430c8")
+
 
 class QdrantWriter:
     """
@@ -13,14 +44,17 @@ class QdrantWriter:
     Ensures collection exists before upsert
     """
 
-    def __init__(self, collection_name: str = "documents"):
+    def __init__(self, collection_name: str = "documents", vector_size: int = 384):
         self.collection_name = collection_name
-        self.client = QdrantClient(url="http://localhost:6333")
+        self.vector_size = vector_size  # all-MiniLM-L6-v2 embedding dimension
+        self.url = "http://localhost:6333"
+        self.client = QdrantClient(url=self.url)
         self._ensure_collection()
 
     def _ensure_collection(self):
         """
-        Create collection if it does not exist
+        Create collection if it does not exist,
+        otherwise verify its vector size and enable quantization
         """
         collections = self.client.get_collections().collections
         exists = any(c.name == self.collection_name for c in collections)
@@ -29,11 +63,77 @@ class QdrantWriter:
             self.client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config=VectorParams(
-                    size=384,  # all-MiniLM-L6-v2 embedding dimension
-                    distance=Distance.COSINE,
+                    size=self.vector_size,
+                    # Embedders emit unit-norm vectors: dot == cosine
+                    distance=Distance.DOT,
                 ),
+                quantization_config=SCALAR_QUANTIZATION,
+            )
+            return
+
+        info = self.client.get_collection(self.collection_name)
+        existing_size = info.config.params.vectors.size
+
+        if existing_size != self.vector_size:
+            raise ValueError(
+                f"Collection '{self.collection_name}' has vector size "
+                f"{existing_size}, expected {self.vector_size}. "
+                f"Recreate the collection to migrate."
+            )
+
+        # The backend usually creates the collection before ingestion runs:
+        # enable quantization on it if it has none
+        if info.config.quantization_config is None:
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                quantization_config=SCALAR_QUANTIZATION,
             )
 
+    @staticmethod
+    def point_id(file_hash: str, chunk_index: int) -> str:
+        """
+        Deterministic point id, so re-ingesting a file overwrites its points
+        """
+        return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{file_hash}:{chunk_index}"))
+
+    def is_ingested(self, file_hash: str, total_chunks: int, doc_id: str) -> bool:
+        """
+        True if every chunk point of this file already exists under doc_id
+
+        Point ids only depend on the file content, so the same file uploaded
+        as another document must be re-upserted to overwrite the payload.
+        """
+        ids = [self.point_id(file_hash, index) for index in range(total_chunks)]
+
+        existing = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=ids,
+            with_payload=["doc_id"],
+            with_vectors=False,
+        )
+
+        return len(existing) == total_chunks and all(
+            point.payload.get("doc_id") == doc_id for point in existing
+        )
+
+    def delete_file(self, file_hash: str):
+        """
+        Delete every point of this file, e.g. to roll back a partial ingest
+        """
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(
+                filter=Filter(
+                    must=[
+                        FieldCondition(
+                            key="file_hash", match=MatchValue(value=file_hash)
+                        )
+                    ]
+                )
+            ),
+            wait=True,
+        )
+
     def upsert_chunks(
         self,
         chunks: List[Dict],
@@ -48,13 +148,34 @@ class QdrantWriter:
         if not chunks:
             raise ValueError("No chunks provided for upsert")
 
-        points = []
+        self.upsert_stream(
+            chunks,
+            doc_id=doc_id,
+            source_file=source_file,
+            file_hash=file_hash,
+            total_chunks=len(chunks),
+        )
+
+    def _iter_batches(
+        self,
+        chunks: Iterable[Dict],
+        doc_id: str,
+        source_file: str,
+        file_hash: str,
+        total_chunks: int,
+        flush: int,
+    ) -> Iterator[Tuple[List[str], List[Dict], np.ndarray]]:
+        """
+        Group embedded chunks into (ids, payloads, vectors) batches of `flush`
+        """
+        ids = []
+        payloads = []
+        vectors = []
 
         ingested_at = datetime.utcnow().isoformat()
-        total_chunks = len(chunks)
 
         for index, chunk in enumerate(chunks):
-            payload = {
+            payloads.append({
                 # 🔑 Deduplication metadata
                 "doc_id": doc_id,
                 "source_file": source_file,
@@ -67,17 +188,128 @@ class QdrantWriter:
 
                 # Content
                 "text": chunk.get("text", ""),
-            }
+            })
+            ids.append(self.point_id(file_hash, index))
 
-            points.append(
-                PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=chunk["embedding"],
-                    payload=payload,
-                )
+            # Embeddings are float32 numpy rows; lists are accepted too
+            vectors.append(np.asarray(chunk["embedding"], dtype=np.float32))
+
+            if len(ids) >= flush:
+                yield ids, payloads, np.stack(vectors)
+                ids, payloads, vectors = [], [], []
+
+        if ids:
+            yield ids, payloads, np.stack(vectors)
+
+    def upsert_stream(
+        self,
+        chunks: Iterable[Dict],
+        doc_id: str,
+        source_file: str,
+        file_hash: str,
+        total_chunks: int,
+        flush: int = UPSERT_BATCH_SIZE,
+    ) -> int:
+        """
+        Upsert embedded chunks from an iterable, flushing every `flush` points
+
+        :return: number of points written
+        """
+        written = 0
+
+        for ids, payloads, vectors in self._iter_batches(
+            chunks, doc_id, source_file, file_hash, total_chunks, flush
+        ):
+            self.client.upload_collection(
+                collection_name=self.collection_name,
+                vectors=vectors,
+                payload=payloads,
+                ids=ids,
+                batch_size=len(ids),
+                wait=True,
             )
+            written += len(ids)
 
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=points,
+        if not written:
+            raise ValueError("No chunks provided for upsert")
+
+        return written
+
+    async def upsert_stream_async(
+        self,
+        chunks: Iterable[Dict],
+        doc_id: str,
+        source_file: str,
+        file_hash: str,
+        total_chunks: int,
+        flush: int = UPSERT_BATCH_SIZE,
+        max_concurrency: int = MAX_CONCURRENT_UPSERTS,
+    ) -> int:
+        """
+        Async variant of upsert_stream: up to `max_concurrency` batches are
+        in flight while the next batch is pulled from `chunks`.
+
+        Batches are pulled in a worker thread, so a CPU-bound producer
+        (e.g. LocalEmbedder.embed_iter) overlaps with network I/O.
+
+        :return: number of points written
+        """
+        batches = self._iter_batches(
+            chunks, doc_id, source_file, file_hash, total_chunks, flush
         )
+        sem = asyncio.Semaphore(max_concurrency)
+        client = AsyncQdrantClient(url=self.url)
+        pending = set()
+        written = 0
+
+        async def _upsert_batch(ids, payloads, vectors):
+            try:
+                await client.upsert(
+                    collection_name=self.collection_name,
+                    points=Batch(
+                        ids=ids,
+                        vectors=vectors.tolist(),
+                        payloads=payloads,
+                    ),
+                    wait=True,
+                )
+            finally:
+                sem.release()
+
+        def _raise_failed():
+            # Re-raise the first failed upsert so no more batches are pulled
+            done = {task for task in pending if task.done()}
+            pending.difference_update(done)
+            for task in done:
+                task.result()
+
+        try:
+            while True:
+                # Acquire before pulling: bounds batches held in memory too
+                await sem.acquire()
+                _raise_failed()
+
+                batch = await asyncio.to_thread(next, batches, None)
+                _raise_failed()
+
+                if batch is None:
+                    sem.release()
+                    break
+
+                pending.add(asyncio.create_task(_upsert_batch(*batch)))
+                written += len(batch[0])
+
+            while pending:
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                _raise_failed()
+        finally:
+            # On error, stop in-flight upserts before closing the client
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await client.close()
+
+        if not written:
+            raise ValueError("No chunks provided for upsert")
+
+        return written
@@ -0,0 +1,7 @@
+# ingestion/tests/conftest.py
+
+import os
+import sys
+
+# Modules import each other relative to ingestion/src (as main.py does)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
@@ -0,0 +1,95 @@
+# ingestion/tests/test_embedding_cache.py
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from embeddings.embedding_cache import EmbeddingCache
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+
+MODEL = "model-a:256"
+
+
+def test_put_get_round_trip(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path))
+    vectors = np.random.rand(2, 384).astype(np.float32)
+
+    try:
+        cache.put_many("h", [0, 1], ["first chunk", "zweiter Abschnitt ü"], vectors, MODEL)
+        hits = cache.get_many("h", [0, 1, 2], ["first chunk", "zweiter Abschnitt ü", "x"], MODEL)
+    finally:
+        cache.close()
+
+    np.testing.assert_array_equal(hits[0], vectors[0])
+    np.testing.assert_array_equal(hits[1], vectors[1])
+    assert hits[2] is None
+
+
+def test_changed_text_is_a_miss(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path))
+
+    try:
+        cache.put_many("h", [0], ["old text"], np.ones((1, 384), dtype=np.float32), MODEL)
+        assert cache.get_many("h", [0], ["new text"], MODEL) == [None]
+    finally:
+        cache.close()
+
+
+def test_other_model_is_a_miss(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path))
+
+    try:
+        cache.put_many("h", [0], ["text"], np.ones((1, 384), dtype=np.float32), MODEL)
+        assert cache.get_many("h", [0], ["text"], "model-b:256") == [None]
+        assert cache.get_many("h", [0], ["text"], "model-a:128") == [None]
+    finally:
+        cache.close()
+
+
+def test_full_cache_grows_then_skips_writes(tmp_path):
+    # 64 KiB map, allowed to double once; each entry is ~1.5 KiB
+    cache = EmbeddingCache(path=str(tmp_path), map_size=1 << 16, max_map_size=1 << 17)
+    vectors = np.ones((20, 384), dtype=np.float32)
+
+    try:
+        assert cache.put_many("a", list(range(20)), ["t"] * 20, vectors, MODEL)
+        assert cache.env.info()["map_size"] == 1 << 17
+
+        # Past max_map_size the write is dropped instead of raising
+        assert not cache.put_many("b", list(range(200)), ["t"] * 200, np.ones((200, 384)), MODEL)
+        assert cache.get_many("b", [0], ["t"], MODEL) == [None]
+    finally:
+        cache.close()
+
+
+def test_map_grown_by_another_process_is_adopted(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path), map_size=1 << 16, max_map_size=1 << 22)
+
+    try:
+        cache.put_many("a", [0], ["t"], np.ones((1, 384), dtype=np.float32), MODEL)
+
+        # A concurrent ingestion (separate process, as the backend spawns
+        # one per upload) grows the shared map
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import numpy as np\n"
+                "from embeddings.embedding_cache import EmbeddingCache\n"
+                f"c = EmbeddingCache(path={str(tmp_path)!r}, map_size=1 << 16, max_map_size=1 << 22)\n"
+                "c.put_many('b', list(range(100)), ['t'] * 100, np.ones((100, 384)), 'model-a:256')\n"
+                "assert c.env.info()['map_size'] > 1 << 16\n"
+                "c.close()\n",
+            ],
+            cwd=SRC_DIR,
+            check=True,
+        )
+
+        assert cache.get_many("a", [0], ["t"], MODEL)[0] is not None
+        assert cache.put_many("c", [0], ["t"], np.ones((1, 384), dtype=np.float32), MODEL)
+        assert cache.get_many("b", [99], ["t"], MODEL)[0] is not None
+    finally:
+        cache.close()
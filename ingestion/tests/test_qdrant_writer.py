@@ -0,0 +1,158 @@
+# ingestion/tests/test_qdrant_writer.py
+
+import asyncio
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams
+
+from pipelines import qdrant_writer
+from pipelines.qdrant_writer import QdrantWriter
+
+
+@pytest.fixture
+def writer():
+    # Bypass __init__'s localhost client: use qdrant-client's local mode
+    writer = QdrantWriter.__new__(QdrantWriter)
+    writer.url = ":memory:"
+    writer.collection_name = "documents"
+    writer.vector_size = 4
+    writer.client = QdrantClient(":memory:")
+    writer._ensure_collection()
+    return writer
+
+
+def _chunks(n):
+    for i in range(n):
+        yield {"text": f"chunk {i}", "embedding": np.full(4, 0.5, dtype=np.float32)}
+
+
+def _count(writer):
+    return writer.client.count(writer.collection_name).count
+
+
+def test_delete_file_rolls_back_partial_stream(writer):
+    writer.upsert_chunks(list(_chunks(3)), doc_id="other", source_file="b.txt", file_hash="keep")
+
+    def failing():
+        yield from _chunks(300)
+        raise RuntimeError("embedder died")
+
+    with pytest.raises(RuntimeError):
+        writer.upsert_stream(
+            failing(), doc_id="d", source_file="a.txt", file_hash="h", total_chunks=400
+        )
+    assert _count(writer) == 3 + 256  # first flush already written
+
+    writer.delete_file("h")
+
+    assert _count(writer) == 3
+    assert not writer.is_ingested("h", 400, "d")
+    assert writer.is_ingested("keep", 3, "other")
+
+
+def test_same_file_under_another_doc_is_not_ingested(writer):
+    writer.upsert_chunks(list(_chunks(3)), doc_id="first", source_file="a.txt", file_hash="h")
+
+    assert writer.is_ingested("h", 3, "first")
+    assert not writer.is_ingested("h", 3, "second")
+
+    # Re-upserting overwrites the payload under the new doc_id
+    writer.upsert_chunks(list(_chunks(3)), doc_id="second", source_file="a.txt", file_hash="h")
+    assert writer.is_ingested("h", 3, "second")
+    assert _count(writer) == 3
+
+
+class FakeAsyncClient:
+    """
+    Stand-in for AsyncQdrantClient: records upserts, optionally fails
+    the first one or blocks until cancelled
+    """
+
+    def __init__(self, fail_first=False, block=False):
+        self.fail_first = fail_first
+        self.block = block
+        self.upserts = 0
+        self.cancelled = 0
+        self.closed = False
+
+    def __call__(self, url):
+        return self
+
+    async def upsert(self, collection_name, points, wait):
+        self.upserts += 1
+        if self.fail_first and self.upserts == 1:
+            raise ConnectionError("qdrant down")
+        if self.block:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                # Only count cancellations done by the writer itself
+                if not self.closed:
+                    self.cancelled += 1
+                raise
+
+    async def close(self):
+        self.closed = True
+
+
+def _run_async_stream(writer, chunks):
+    return asyncio.run(writer.upsert_stream_async(
+        chunks, doc_id="d", source_file="a.txt", file_hash="h", total_chunks=2560
+    ))
+
+
+def test_async_stream_stops_pulling_after_failed_upsert(writer, monkeypatch):
+    fake = FakeAsyncClient(fail_first=True)
+    monkeypatch.setattr(qdrant_writer, "AsyncQdrantClient", fake)
+    pulled = []
+
+    def producer():
+        for chunk in _chunks(2560):
+            pulled.append(chunk)
+            yield chunk
+
+    with pytest.raises(ConnectionError):
+        _run_async_stream(writer, producer())
+
+    # At most the batch being pulled when the failure landed, not all 10
+    assert len(pulled) <= 2 * 256
+    assert fake.upserts <= 2
+    assert fake.closed
+
+
+def test_async_stream_cancels_in_flight_upserts_on_producer_error(writer, monkeypatch):
+    fake = FakeAsyncClient(block=True)
+    monkeypatch.setattr(qdrant_writer, "AsyncQdrantClient", fake)
+
+    def producer():
+        yield from _chunks(3 * 256)
+        raise RuntimeError("embedder died")
+
+    with pytest.raises(RuntimeError):
+        _run_async_stream(writer, producer())
+
+    assert fake.upserts == 3
+    assert fake.cancelled == 3
+    assert fake.closed
+
+
+def test_existing_collection_without_quantization_gets_it(monkeypatch):
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "documents", vectors_config=VectorParams(size=4, distance=Distance.COSINE)
+    )
+    updates = []
+    monkeypatch.setattr(client, "update_collection", lambda **kwargs: updates.append(kwargs))
+
+    writer = QdrantWriter.__new__(QdrantWriter)
+    writer.collection_name = "documents"
+    writer.vector_size = 4
+    writer.client = client
+    writer._ensure_collection()
+
+    assert updates == [{
+        "collection_name": "documents",
+        "quantization_config": qdrant_writer.SCALAR_QUANTIZATION,
+    }]